@@ -8,42 +8,72 @@ armazenamento para cada tipo de dado.
 URL Base: https://cdn.tse.jus.br/estatistica/sead/odsele/{consulta}/{arquivo}
 """
 
-# Mapeamento de consultas para configurações
-CONSULTAS_CONFIG = {
-    'cand': {
-        'consulta': 'consulta_cand',
-        'pasta_destino': 'candidatos',
-        'descricao': 'Dados de candidatos'
-    },
-    'cassacao': {
-        'consulta': 'motivo_cassacao',
-        'pasta_destino': 'cassacao_candidatos',
-        'descricao': 'Motivos de cassação de candidatos'
-    },
-    'bens': {
-        'consulta': 'bem_candidato',
-        'pasta_destino': 'bens_candidatos',
-        'descricao': 'Bens declarados por candidatos'
-    },
-    'vot_partido': {
-        'consulta': 'votacao_partido_munzona',
-        'pasta_destino': 'votacao_partido_munzona',
-        'descricao': 'Votação por partido, município e zona'
-    },
-    'vot_cand': {
-        'consulta': 'votacao_candidato_munzona',
-        'pasta_destino': 'votacao_candidato_munzona',
-        'descricao': 'Votação nominal por candidato, município e zona'
-    },
-    'comparecimento': {
-        'consulta': 'perfil_comparecimento_abstencao',
-        'pasta_destino': 'comparecimento_abstencao',
-        'descricao': 'Comparecimento e Abstenção das eleições'
-    }
-}
+from collections import namedtuple
+from types import MappingProxyType
 
 # URL base do portal TSE
 TSE_BASE_URL = "https://cdn.tse.jus.br/estatistica/sead/odsele"
 
+# Configuração imutável de uma consulta, com os modelos de nome do ZIP e URL já montados
+# (basta formatar com o ano: cfg.url_fmt.format(ano=2022))
+Consulta = namedtuple('Consulta', 'consulta pasta_destino descricao zip_fmt url_fmt')
+
+
+def _consulta(consulta: str, pasta_destino: str, descricao: str) -> Consulta:
+    """
+    Cria a configuração de uma consulta com os modelos de nome do ZIP e URL pré-calculados.
+    
+    Args:
+        consulta (str): Nome da consulta no portal TSE (ex: 'consulta_cand')
+        pasta_destino (str): Pasta de armazenamento dentro do caminho base
+        descricao (str): Descrição exibida ao usuário
+    
+    Returns:
+        Consulta: Configuração da consulta
+    """
+    zip_fmt = f"{consulta}_{{ano}}.zip"
+    return Consulta(
+        consulta=consulta,
+        pasta_destino=pasta_destino,
+        descricao=descricao,
+        zip_fmt=zip_fmt,
+        url_fmt=f"{TSE_BASE_URL}/{consulta}/{zip_fmt}"
+    )
+
+
+# Mapeamento de consultas para configurações (somente leitura)
+CONSULTAS_CONFIG = MappingProxyType({
+    'cand': _consulta(
+        consulta='consulta_cand',
+        pasta_destino='candidatos',
+        descricao='Dados de candidatos'
+    ),
+    'cassacao': _consulta(
+        consulta='motivo_cassacao',
+        pasta_destino='cassacao_candidatos',
+        descricao='Motivos de cassação de candidatos'
+    ),
+    'bens': _consulta(
+        consulta='bem_candidato',
+        pasta_destino='bens_candidatos',
+        descricao='Bens declarados por candidatos'
+    ),
+    'vot_partido': _consulta(
+        consulta='votacao_partido_munzona',
+        pasta_destino='votacao_partido_munzona',
+        descricao='Votação por partido, município e zona'
+    ),
+    'vot_cand': _consulta(
+        consulta='votacao_candidato_munzona',
+        pasta_destino='votacao_candidato_munzona',
+        descricao='Votação nominal por candidato, município e zona'
+    ),
+    'comparecimento': _consulta(
+        consulta='perfil_comparecimento_abstencao',
+        pasta_destino='comparecimento_abstencao',
+        descricao='Comparecimento e Abstenção das eleições'
+    )
+})
+
 # Caminho base padrão para armazenamento (relativo ao diretório do script)
 DEFAULT_BASE_PATH = "../../data/raw"
@@ -1,16 +1,29 @@
 import requests
+import urllib3
 import zipfile
+import json
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-import tempfile
+import io
+import mmap
+import shutil
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Importar configurações
-from config_ingest import CONSULTAS_CONFIG, TSE_BASE_URL
+from config_ingest import CONSULTAS_CONFIG
 
 # Importar gerenciador de metadados de cache
 from metadata_handler import (
-    check_if_download_needed,
+    compute_content_hash,
+    find_cached_file_with_hash,
+    get_conditional_headers,
     update_metadata_after_download
 )
 
@@ -18,7 +31,846 @@ from metadata_handler import (
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def download_tse_data(tipo_consulta: str, ano: int, base_path: str = None) -> str:
+# Número máximo de tentativas para requisições HTTP
+MAX_RETRIES = 3
+
+# Limite global de downloads simultâneos (evita rajadas de requisições ao servidor do TSE)
+MAX_CONCURRENT_DOWNLOADS = 4
+
+# Download de um único ZIP em partes paralelas via requisições HTTP Range
+RANGE_PARTS = 4  # Número de conexões simultâneas por arquivo
+RANGE_MIN_SIZE = 32 * 1024 * 1024  # Arquivos menores são baixados em uma única conexão
+
+# ZIPs menores que este tamanho são baixados em memória, sem arquivo parcial em disco
+# (mesmo limite do download em partes: cada tamanho de arquivo cai em uma única estratégia)
+MEMORY_ZIP_MAX_SIZE = RANGE_MIN_SIZE
+
+# Bytes lidos do final do ZIP na extração remota (diretório central)
+RANGE_TAIL_SIZE = 64 * 1024
+
+# Tamanho do buffer usado ao gravar arquivos em disco
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Janela de descompressão do CSV (readinto direto no arquivo de destino mapeado em memória)
+EXTRACT_WINDOW_SIZE = 4 * 1024 * 1024
+
+# Requisições Range pedem o arquivo sem compressão de transporte: com gzip/br os
+# offsets se referem ao corpo comprimido, e a descompressão transparente do
+# requests os desalinharia dos bytes gravados em disco. Demais requisições usam a
+# negociação padrão do requests (gzip/deflate, e br/zstd se instalados).
+_HEADERS_RANGE = {'Accept-Encoding': 'identity'}
+
+# Semáforo compartilhado por todas as chamadas, inclusive as feitas fora de download_many
+_DOWNLOAD_SEM = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS)
+
+# Diretórios já criados/verificados neste processo (evita mkdir/stat repetidos em lote)
+_MKDIR_CACHE = set()
+
+# Sessão HTTP compartilhada entre threads (reaproveita conexões TCP/TLS com o CDN do TSE)
+# O Retry do urllib3 repete falhas de conexão e erros 5xx antes de o corpo começar a ser lido;
+# falhas no meio do download são tratadas por _baixar_zip_retomavel (retomada via Range)
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=MAX_CONCURRENT_DOWNLOADS,
+    pool_maxsize=MAX_CONCURRENT_DOWNLOADS * RANGE_PARTS,
+    max_retries=Retry(
+        total=MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504]
+    )
+)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+
+
+class _RangeNaoSuportado(Exception):
+    """Servidor ignorou o header Range (respondeu 200 em vez de 206)."""
+
+
+class _NaoModificado(Exception):
+    """Servidor respondeu 304 Not Modified a uma requisição condicional."""
+
+
+class _ParcialCompleto(Exception):
+    """O arquivo parcial já contém o arquivo remoto inteiro (416 com o mesmo tamanho)."""
+    
+    def __init__(self, headers: Dict):
+        super().__init__()
+        self.headers = headers
+
+
+def _ensure_dir(caminho: Path) -> None:
+    """Cria o diretório (e os pais) apenas na primeira vez que é usado neste processo."""
+    if caminho in _MKDIR_CACHE:
+        return
+    caminho.mkdir(parents=True, exist_ok=True)
+    _MKDIR_CACHE.add(caminho)
+
+
+def _criar_diretorio_destino(caminho: Path) -> List[Path]:
+    """
+    Cria o diretório como _ensure_dir e informa quais diretórios não existiam antes.
+    
+    Returns:
+        List[Path]: Diretórios criados agora, do mais interno ao mais externo
+    """
+    criados = []
+    if caminho not in _MKDIR_CACHE:
+        atual = caminho
+        while not atual.exists():
+            criados.append(atual)
+            atual = atual.parent
+    _ensure_dir(caminho)
+    return criados
+
+
+def _remover_diretorios_criados(criados: List[Path]) -> None:
+    """Remove os diretórios recém-criados que continuarem vazios (ex: após falha na extração)."""
+    for caminho in criados:
+        _MKDIR_CACHE.discard(caminho)
+    for caminho in criados:
+        try:
+            caminho.rmdir()
+        except OSError:
+            # Não vazio (outro download usa o diretório) ou já removido
+            break
+
+
+def _caminho_info_parcial(destino: Path) -> Path:
+    """Retorna o caminho do arquivo auxiliar com ETag/Last-Modified de um download parcial."""
+    return destino.with_name(destino.name + '.json')
+
+
+def _remover_parcial(destino: Path) -> None:
+    """Remove o arquivo parcial e seu arquivo auxiliar, se existirem."""
+    for caminho in (destino, _caminho_info_parcial(destino)):
+        try:
+            caminho.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _carregar_info_parcial(destino: Path) -> Optional[Dict]:
+    """Retorna o conteúdo do arquivo auxiliar de um download parcial (None se ausente ou inválido)."""
+    try:
+        return json.loads(_caminho_info_parcial(destino).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_info_parcial(destino: Path, info: Dict) -> None:
+    """Grava o arquivo auxiliar do download parcial de forma atômica (temporário + os.replace)."""
+    caminho = _caminho_info_parcial(destino)
+    tmp_path = caminho.with_name(caminho.name + '.tmp')
+    tmp_path.write_text(json.dumps(info), encoding='utf-8')
+    os.replace(tmp_path, caminho)
+
+
+def _carregar_validador_parcial(destino: Path) -> Optional[str]:
+    """Retorna o ETag (ou Last-Modified) da versão do arquivo que está sendo baixada parcialmente."""
+    info = _carregar_info_parcial(destino)
+    if not info or 'partes' in info:
+        # Download em partes: arquivo pré-alocado, retomado por _retomar_zip_paralelo (não por offset)
+        return None
+    return info.get('ETag') or info.get('Last-Modified')
+
+
+def _tamanho_remoto_416(response: requests.Response) -> Optional[int]:
+    """Extrai o tamanho total do header 'Content-Range: bytes */<total>' de uma resposta 416."""
+    content_range = response.headers.get('Content-Range', '')
+    if not content_range.startswith('bytes */'):
+        return None
+    try:
+        return int(content_range[len('bytes */'):])
+    except ValueError:
+        return None
+
+
+def _copiar_corpo(response: requests.Response, arquivo) -> None:
+    """
+    Grava o corpo da resposta no arquivo em blocos de COPY_BUFFER_SIZE.
+    
+    Lê direto do stream do urllib3 (response.raw), sem o gerador iter_content.
+    Erros do urllib3 são convertidos em requests.ConnectionError para que a
+    lógica de retomada trate as falhas da mesma forma.
+    """
+    response.raw.decode_content = True
+    try:
+        shutil.copyfileobj(response.raw, arquivo, length=COPY_BUFFER_SIZE)
+    except urllib3.exceptions.HTTPError as e:
+        raise requests.ConnectionError(e, response=response)
+
+
+def _abrir_download(url: str, destino: Path, headers_condicionais: Dict = None) -> requests.Response:
+    """
+    Abre o GET do arquivo ZIP, pedindo apenas os bytes restantes se houver download parcial.
+    
+    Se já houver bytes salvos em destino, envia Range a partir do último byte
+    junto com If-Range: o servidor responde 206 (continua de onde parou) se o
+    arquivo não mudou, ou 200 (arquivo completo) se mudou.
+    
+    Args:
+        url (str): URL do arquivo
+        destino (Path): Caminho do arquivo parcial
+        headers_condicionais (Dict, optional): If-None-Match / If-Modified-Since do cache salvo
+    
+    Returns:
+        requests.Response: Resposta em modo stream (corpo ainda não lido)
+    
+    Raises:
+        _NaoModificado: Se o servidor responder 304 (cache válido)
+        _ParcialCompleto: Se o arquivo parcial já tiver todos os bytes do arquivo remoto
+    """
+    offset = destino.stat().st_size if destino.exists() else 0
+    validador = _carregar_validador_parcial(destino) if offset else None
+    
+    headers = dict(headers_condicionais or {})
+    if offset and validador:
+        headers.update({'Range': f'bytes={offset}-', 'If-Range': validador, **_HEADERS_RANGE})
+        logger.info(f"Retomando download a partir do byte {offset}")
+    
+    response = _SESSION.get(url, headers=headers, timeout=300, stream=True)
+    
+    # 304, ou servidor que ignora If-None-Match mas devolve o mesmo ETag já salvo
+    etag_salvo = headers.get('If-None-Match')
+    if response.status_code == 304 or (etag_salvo and response.headers.get('ETag') == etag_salvo):
+        response.close()
+        raise _NaoModificado()
+    if response.status_code == 416 and 'Range' in headers:
+        response.close()
+        info = _carregar_info_parcial(destino) or {}
+        etag_remoto = response.headers.get('ETag')
+        if (
+            _tamanho_remoto_416(response) == offset
+            and (not etag_remoto or not info.get('ETag') or etag_remoto == info['ETag'])
+        ):
+            # Download anterior terminou mas a extração foi interrompida: reaproveitar o arquivo
+            logger.info(f"Arquivo parcial já está completo ({offset} bytes)")
+            raise _ParcialCompleto({
+                'ETag': info.get('ETag'),
+                'Last-Modified': info.get('Last-Modified')
+            })
+        
+        # Arquivo parcial inconsistente com o remoto: descartar e pedir o arquivo completo
+        logger.warning("Arquivo parcial inconsistente com o remoto (416). Recomeçando o download.")
+        _remover_parcial(destino)
+        return _abrir_download(url, destino, headers_condicionais)
+    if not response.ok:
+        response.close()
+        response.raise_for_status()
+    
+    return response
+
+
+def _baixar_zip_stream(url: str, destino: Path, response: requests.Response = None) -> Dict:
+    """
+    Baixa o arquivo em uma única conexão HTTP, retomando um download parcial se existir.
+    
+    Args:
+        url (str): URL do arquivo
+        destino (Path): Caminho do arquivo parcial
+        response (requests.Response, optional): Resposta já aberta por _abrir_download
+    
+    Returns:
+        Dict: Headers da resposta GET
+    """
+    if response is None:
+        try:
+            response = _abrir_download(url, destino)
+        except _ParcialCompleto as e:
+            # Conexão caiu exatamente no fim do arquivo: nada a baixar
+            return e.headers
+    
+    with response:
+        if response.status_code == 206:
+            modo = 'ab'
+        else:
+            modo = 'wb'
+            if response.headers.get('Content-Encoding', 'identity') == 'identity':
+                # Download completo: registrar a versão sendo baixada para permitir retomada
+                info = {
+                    'ETag': response.headers.get('ETag'),
+                    'Last-Modified': response.headers.get('Last-Modified')
+                }
+                _gravar_info_parcial(destino, info)
+            else:
+                # Corpo comprimido é descomprimido ao gravar: offsets em disco não correspondem
+                # aos do servidor, então este download não pode ser retomado via Range
+                _remover_parcial(destino)
+        
+        with open(destino, modo) as f:
+            _copiar_corpo(response, f)
+        
+        return response.headers
+
+
+def _baixar_zip_retomavel(url: str, destino: Path, response: requests.Response = None) -> Dict:
+    """
+    Executa _baixar_zip_stream com até MAX_RETRIES tentativas e backoff exponencial.
+    
+    Cada nova tentativa retoma a partir dos bytes já gravados em destino.
+    
+    Returns:
+        Dict: Headers da resposta GET bem-sucedida
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            return _baixar_zip_stream(url, destino, response)
+        except requests.RequestException as e:
+            if attempt == MAX_RETRIES:
+                raise
+            espera = 2 ** (attempt - 1)
+            logger.warning(f"Tentativa {attempt}/{MAX_RETRIES} de download falhou: {e}. Retomando em {espera}s...")
+            time.sleep(espera)
+        finally:
+            # Resposta inicial só pode ser consumida uma vez
+            response = None
+
+
+def _baixar_parte(url: str, destino: Path, inicio: int, fim: int, validador: str) -> Dict:
+    """
+    Baixa o intervalo de bytes [inicio, fim] e grava na mesma posição do arquivo de destino.
+    
+    Cada parte usa seu próprio handle de arquivo, então as escritas concorrentes
+    não precisam de lock (os intervalos não se sobrepõem).
+    
+    Returns:
+        Dict: Headers da resposta 206
+    """
+    headers = {'Range': f'bytes={inicio}-{fim}', **_HEADERS_RANGE}
+    if validador:
+        # Garante que todas as partes venham da mesma versão do arquivo
+        headers['If-Range'] = validador
+    
+    with _SESSION.get(url, headers=headers, timeout=300, stream=True) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise _RangeNaoSuportado(f"Status {response.status_code} para Range bytes={inicio}-{fim}")
+        
+        with open(destino, 'r+b') as f:
+            f.seek(inicio)
+            _copiar_corpo(response, f)
+        
+        return response.headers
+
+
+def _gravar_inicio(response: requests.Response, destino: Path, tamanho: int) -> None:
+    """Grava os primeiros `tamanho` bytes do corpo de uma resposta completa (200) no início do arquivo."""
+    with response, open(destino, 'r+b') as f:
+        restante = tamanho
+        while restante:
+            try:
+                chunk = response.raw.read(min(COPY_BUFFER_SIZE, restante))
+            except urllib3.exceptions.HTTPError as e:
+                raise requests.ConnectionError(e, response=response)
+            if not chunk:
+                raise requests.ConnectionError(f"Conexão encerrada antes do fim da primeira parte de {response.url}")
+            f.write(chunk)
+            restante -= len(chunk)
+
+
+def _aceita_download_paralelo(response: requests.Response) -> bool:
+    """Verifica se uma resposta completa (200) permite dividir o restante do download em partes."""
+    tamanho_total = int(response.headers.get('Content-Length') or 0)
+    return (
+        response.status_code == 200
+        and response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        and not response.headers.get('Content-Encoding')
+        and tamanho_total >= RANGE_MIN_SIZE
+    )
+
+
+def _aceita_download_em_memoria(response: requests.Response) -> bool:
+    """Verifica se a resposta 200 declara um ZIP pequeno o bastante para ficar em memória."""
+    if response.status_code != 200:
+        return False
+    try:
+        tamanho = int(response.headers.get('Content-Length', 0))
+    except ValueError:
+        return False
+    return 0 < tamanho < MEMORY_ZIP_MAX_SIZE
+
+
+def _baixar_zip_memoria(response: requests.Response) -> io.BytesIO:
+    """
+    Lê o corpo da resposta inteiro para um buffer em memória.
+    
+    Args:
+        response (requests.Response): Resposta 200 já aberta por _abrir_download
+    
+    Returns:
+        io.BytesIO: Conteúdo do ZIP, posicionado no início
+    """
+    buffer = io.BytesIO()
+    with response:
+        _copiar_corpo(response, buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _dividir_partes(total: int) -> List[Tuple[int, int]]:
+    """Divide [0, total) em até RANGE_PARTS intervalos inclusivos (inicio, fim)."""
+    tamanho_parte = -(-total // RANGE_PARTS)  # Divisão com arredondamento para cima
+    return [
+        (i * tamanho_parte, min((i + 1) * tamanho_parte - 1, total - 1))
+        for i in range(RANGE_PARTS)
+        if i * tamanho_parte < total
+    ]
+
+
+def _registrar_parte(destino: Path, info: Dict, lock: threading.Lock, parte: Tuple[int, int]) -> None:
+    """Marca uma parte como concluída no arquivo auxiliar, para que a retomada não a baixe de novo."""
+    with lock:
+        info['concluidas'].append(list(parte))
+        _gravar_info_parcial(destino, info)
+
+
+def _baixar_e_registrar_parte(
+    url: str,
+    destino: Path,
+    parte: Tuple[int, int],
+    validador: str,
+    info: Dict,
+    lock: threading.Lock
+) -> None:
+    """Baixa uma parte com _baixar_parte e a registra como concluída."""
+    _baixar_parte(url, destino, parte[0], parte[1], validador)
+    _registrar_parte(destino, info, lock, parte)
+
+
+def _baixar_zip_paralelo(url: str, destino: Path, response: requests.Response) -> Dict:
+    """
+    Baixa o arquivo em RANGE_PARTS partes simultâneas, gravadas em um arquivo pré-alocado.
+    
+    A primeira parte é lida da própria resposta completa já aberta; as demais
+    são pedidas com requisições Range em paralelo. As partes concluídas ficam
+    registradas no arquivo auxiliar, e uma execução interrompida é retomada por
+    _retomar_zip_paralelo baixando só as que faltam.
+    
+    Args:
+        url (str): URL do arquivo
+        destino (Path): Caminho do arquivo de destino
+        response (requests.Response): Resposta 200 aberta por _abrir_download
+    
+    Returns:
+        Dict: Headers da resposta completa
+    
+    Raises:
+        _RangeNaoSuportado: Se o servidor não responder com 206 Partial Content
+    """
+    total = int(response.headers['Content-Length'])
+    validador = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    
+    # Pré-alocar arquivo com o tamanho total
+    with open(destino, 'wb') as f:
+        f.truncate(total)
+    
+    partes = _dividir_partes(total)
+    
+    info = {
+        'ETag': response.headers.get('ETag'),
+        'Last-Modified': response.headers.get('Last-Modified'),
+        'tamanho': total,
+        'partes': [list(parte) for parte in partes],
+        'concluidas': []
+    }
+    if validador:
+        _gravar_info_parcial(destino, info)
+    else:
+        # Sem validador não há como garantir que a retomada veja a mesma versão do arquivo
+        _caminho_info_parcial(destino).unlink(missing_ok=True)
+    lock = threading.Lock()
+    
+    logger.info(f"Baixando em {len(partes)} partes paralelas ({total} bytes)")
+    
+    with ThreadPoolExecutor(max_workers=len(partes) - 1) as executor:
+        futures = [
+            executor.submit(_baixar_e_registrar_parte, url, destino, parte, validador, info, lock)
+            for parte in partes[1:]
+        ]
+        _gravar_inicio(response, destino, partes[0][1] + 1)
+        _registrar_parte(destino, info, lock, partes[0])
+        for future in futures:
+            future.result()
+    
+    return response.headers
+
+
+def _retomar_zip_paralelo(url: str, destino: Path, info: Dict) -> Dict:
+    """
+    Retoma um download em partes interrompido, baixando apenas as partes não concluídas.
+    
+    Cada parte é pedida com If-Range: se o arquivo remoto mudou, o servidor
+    responde 200 e a retomada é abandonada.
+    
+    Args:
+        url (str): URL do arquivo
+        destino (Path): Caminho do arquivo pré-alocado
+        info (Dict): Conteúdo do arquivo auxiliar gravado por _baixar_zip_paralelo
+    
+    Returns:
+        Dict: ETag e Last-Modified da versão baixada
+    
+    Raises:
+        _RangeNaoSuportado: Se o arquivo parcial estiver inconsistente ou o arquivo remoto tiver mudado
+    """
+    validador = info.get('ETag') or info.get('Last-Modified')
+    partes = [tuple(parte) for parte in info.get('partes', [])]
+    tamanho_local = destino.stat().st_size if destino.exists() else None
+    if not validador or not partes or tamanho_local != info.get('tamanho'):
+        raise _RangeNaoSuportado("arquivo parcial inconsistente")
+    
+    concluidas = {tuple(parte) for parte in info.get('concluidas', [])}
+    pendentes = [parte for parte in partes if parte not in concluidas]
+    info['concluidas'] = [list(parte) for parte in partes if parte in concluidas]
+    lock = threading.Lock()
+    
+    logger.info(f"Retomando download em partes: {len(pendentes)} de {len(partes)} partes restantes")
+    
+    if pendentes:
+        with ThreadPoolExecutor(max_workers=len(pendentes)) as executor:
+            futures = [
+                executor.submit(_baixar_e_registrar_parte, url, destino, parte, validador, info, lock)
+                for parte in pendentes
+            ]
+            for future in futures:
+                future.result()
+    
+    return {'ETag': info.get('ETag'), 'Last-Modified': info.get('Last-Modified')}
+
+
+def _retomar_zip_paralelo_retentando(url: str, destino: Path) -> Dict:
+    """
+    Executa _retomar_zip_paralelo com até MAX_RETRIES tentativas e backoff exponencial.
+    
+    Cada tentativa relê o arquivo auxiliar, então só as partes ainda não
+    concluídas são pedidas de novo. Após a última falha o arquivo parcial é
+    mantido, para que a próxima execução continue de onde parou.
+    
+    Returns:
+        Dict: ETag e Last-Modified da versão baixada
+    
+    Raises:
+        _RangeNaoSuportado: Se o arquivo parcial estiver inconsistente ou o arquivo remoto tiver mudado
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            return _retomar_zip_paralelo(url, destino, _carregar_info_parcial(destino) or {})
+        except requests.RequestException as e:
+            if attempt == MAX_RETRIES:
+                raise
+            espera = 2 ** (attempt - 1)
+            logger.warning(
+                f"Tentativa {attempt}/{MAX_RETRIES} de retomada em partes falhou: {e}. "
+                f"Retomando em {espera}s..."
+            )
+            time.sleep(espera)
+
+
+def _baixar_zip(
+    url: str,
+    destino: Path,
+    headers_condicionais: Dict = None
+) -> Tuple[Dict, Union[Path, io.BytesIO]]:
+    """
+    Baixa o arquivo ZIP, escolhendo a estratégia a partir da resposta do GET.
+    
+    - Download em partes interrompido: baixa só as partes que faltam
+    - Download parcial existente: retoma em conexão única (Range + If-Range),
+      ou usa o arquivo direto se ele já estiver completo (416)
+    - Arquivo pequeno (< MEMORY_ZIP_MAX_SIZE): lido para a memória, sem tocar o disco
+    - Arquivo grande e servidor com suporte a Range: divide em partes paralelas
+    - Demais casos: conexão única, com retomada em caso de falha
+    
+    Args:
+        url (str): URL do arquivo
+        destino (Path): Caminho do arquivo parcial
+        headers_condicionais (Dict, optional): If-None-Match / If-Modified-Since do cache salvo
+    
+    Returns:
+        Tuple[Dict, Union[Path, io.BytesIO]]: Headers da resposta GET e o ZIP baixado
+                                              (destino, ou o buffer em memória)
+    
+    Raises:
+        _NaoModificado: Se o servidor responder 304 (cache válido)
+        requests.RequestException: Se o download falhar após MAX_RETRIES tentativas
+    """
+    info_parcial = _carregar_info_parcial(destino)
+    if info_parcial and 'partes' in info_parcial:
+        try:
+            return _retomar_zip_paralelo_retentando(url, destino), destino
+        except _RangeNaoSuportado as e:
+            # Partes gravadas podem ser de outra versão do arquivo: descartar
+            _remover_parcial(destino)
+            logger.warning(f"Retomada do download em partes falhou ({e}). Baixando novamente.")
+    
+    try:
+        response = _abrir_download(url, destino, headers_condicionais)
+    except _ParcialCompleto as e:
+        # ZIP completo deixado por uma execução interrompida antes da extração
+        return e.headers, destino
+    
+    if _aceita_download_em_memoria(response):
+        # Resposta completa: um download parcial anterior (se houver) ficou obsoleto
+        _remover_parcial(destino)
+        try:
+            return response.headers, _baixar_zip_memoria(response)
+        except requests.RequestException as e:
+            logger.warning(f"Download em memória falhou ({e}). Baixando para disco com retomada.")
+            response = None
+    
+    elif _aceita_download_paralelo(response):
+        try:
+            return _baixar_zip_paralelo(url, destino, response), destino
+        except requests.RequestException as e:
+            # Falha transitória: as partes concluídas estão registradas, pedir só as que faltam
+            logger.warning(f"Download em partes falhou ({e}). Retomando as partes restantes.")
+            try:
+                return _retomar_zip_paralelo_retentando(url, destino), destino
+            except _RangeNaoSuportado as e:
+                _remover_parcial(destino)
+                logger.warning(f"Retomada do download em partes falhou ({e}). Usando conexão única.")
+        except _RangeNaoSuportado as e:
+            # Servidor não atende Range nesta versão do arquivo: descartar e usar conexão única
+            _remover_parcial(destino)
+            logger.warning(f"Download em partes falhou ({e}). Usando conexão única.")
+        response = None
+    
+    return _baixar_zip_retomavel(url, destino, response), destino
+
+
+class _RangeHTTPFile(io.RawIOBase):
+    """
+    Arquivo remoto somente leitura com acesso aleatório via requisições HTTP Range.
+    
+    Permite que zipfile.ZipFile leia apenas o diretório central (no final do ZIP)
+    e os bytes da entrada desejada. Na abertura, os últimos RANGE_TAIL_SIZE bytes
+    são lidos de uma vez (revelam o tamanho total e normalmente contêm todo o
+    diretório central). Leituras sequenciais reaproveitam a mesma resposta HTTP;
+    uma nova requisição só é feita quando a posição muda.
+    
+    Raises:
+        _RangeNaoSuportado: Se o servidor não responder com 206 Partial Content
+        _NaoModificado: Se o servidor responder 304 aos headers condicionais
+    """
+    
+    def __init__(self, url: str, headers_condicionais: Dict = None):
+        self.url = url
+        self._pos = 0
+        self._response = None
+        self._pos_response = None
+        
+        # Ler o final do arquivo: define tamanho, validador e headers
+        headers = dict(headers_condicionais or {})
+        headers.update({'Range': f'bytes=-{RANGE_TAIL_SIZE}', **_HEADERS_RANGE})
+        # stream=True: um servidor que ignore Range (200) não tem o ZIP inteiro lido só para ser descartado
+        with _SESSION.get(url, headers=headers, timeout=300, stream=True) as response:
+            # 304, ou servidor que ignora If-None-Match mas devolve o mesmo ETag já salvo
+            etag_salvo = headers.get('If-None-Match')
+            if response.status_code == 304 or (etag_salvo and response.headers.get('ETag') == etag_salvo):
+                raise _NaoModificado()
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise _RangeNaoSuportado(f"Status {response.status_code} para Range bytes=-{RANGE_TAIL_SIZE}")
+            
+            # Content-Range: bytes <inicio>-<fim>/<total>
+            self.tamanho = int(response.headers['Content-Range'].rsplit('/', 1)[1])
+            self.validador = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            self.headers = response.headers
+            self._final = response.content
+        self._inicio_final = self.tamanho - len(self._final)
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.tamanho + offset
+        else:
+            raise ValueError(f"whence inválido: {whence}")
+        return self._pos
+    
+    def readinto(self, buffer) -> int:
+        # Preenche o buffer por completo (zipfile não trata leituras parciais)
+        view = memoryview(buffer).cast('B')
+        lidos = 0
+        
+        while lidos < len(view) and self._pos < self.tamanho:
+            restante = len(view) - lidos
+            
+            if self._pos >= self._inicio_final:
+                # Trecho já carregado na abertura
+                inicio = self._pos - self._inicio_final
+                data = self._final[inicio:inicio + restante]
+            else:
+                # Abrir nova requisição apenas se a leitura não continua a resposta atual
+                if self._response is None or self._pos_response != self._pos:
+                    self._abrir(self._pos)
+                
+                try:
+                    data = self._response.raw.read(min(restante, self._inicio_final - self._pos))
+                except urllib3.exceptions.HTTPError as e:
+                    raise requests.ConnectionError(e, response=self._response)
+                if not data:
+                    raise requests.ConnectionError(f"Conexão encerrada antes do fim do intervalo em {self.url}")
+                self._pos_response = self._pos + len(data)
+            
+            view[lidos:lidos + len(data)] = data
+            lidos += len(data)
+            self._pos += len(data)
+        
+        return lidos
+    
+    def _abrir(self, inicio: int) -> None:
+        """Abre uma requisição Range de inicio até o trecho final já carregado."""
+        self._fechar_response()
+        
+        headers = {'Range': f'bytes={inicio}-{self._inicio_final - 1}', **_HEADERS_RANGE}
+        if self.validador:
+            headers['If-Range'] = self.validador
+        
+        response = _SESSION.get(self.url, headers=headers, timeout=300, stream=True)
+        response.raise_for_status()
+        if response.status_code != 206:
+            response.close()
+            raise _RangeNaoSuportado(f"Status {response.status_code} para Range bytes={inicio}-")
+        
+        self._response = response
+        self._pos_response = inicio
+    
+    def _fechar_response(self) -> None:
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+    
+    def close(self) -> None:
+        self._fechar_response()
+        super().close()
+
+
+def _descompactar_entrada(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, destino: Path) -> None:
+    """
+    Descompacta uma entrada do ZIP em destino, pré-alocado com o tamanho final e mapeado em memória.
+    
+    A descompressão grava direto nas páginas do arquivo (readinto em janelas de
+    EXTRACT_WINDOW_SIZE), sem buffers intermediários em Python.
+    
+    Args:
+        zip_ref (zipfile.ZipFile): ZIP aberto
+        info (zipfile.ZipInfo): Entrada a descompactar
+        destino (Path): Arquivo de destino (sobrescrito)
+    
+    Raises:
+        zipfile.BadZipFile: Se o conteúdo descompactado não tiver o tamanho declarado ou o CRC falhar
+    """
+    tamanho = info.file_size
+    
+    with zip_ref.open(info) as src, open(destino, 'w+b') as dst:
+        # mmap não aceita arquivos vazios
+        if tamanho == 0:
+            if src.read(1):
+                raise zipfile.BadZipFile(f"{info.filename}: conteúdo maior que o declarado")
+            return
+        
+        os.ftruncate(dst.fileno(), tamanho)
+        
+        with mmap.mmap(dst.fileno(), tamanho) as mm:
+            with memoryview(mm) as view:
+                offset = 0
+                while offset < tamanho:
+                    with view[offset:offset + EXTRACT_WINDOW_SIZE] as janela:
+                        lidos = src.readinto(janela)
+                    if not lidos:
+                        raise zipfile.BadZipFile(f"{info.filename}: conteúdo menor que o declarado")
+                    offset += lidos
+            
+            # Ler até o fim da entrada força a verificação do CRC pelo zipfile
+            if src.read(1):
+                raise zipfile.BadZipFile(f"{info.filename}: conteúdo maior que o declarado")
+            
+            mm.flush()
+
+
+def _extrair_brasil_csv(arquivo_zip, arquivo_brasil: str, caminho_final: Path) -> str:
+    """
+    Localiza o arquivo BRASIL.csv no ZIP e o descompacta diretamente em caminho_final.
+    
+    Args:
+        arquivo_zip (Path ou arquivo): ZIP local ou objeto de arquivo com seek (ex: io.BytesIO, _RangeHTTPFile)
+        arquivo_brasil (str): Nome esperado do arquivo BRASIL.csv
+        caminho_final (Path): Caminho de destino do CSV
+    
+    Returns:
+        str: Nome do arquivo extraído dentro do ZIP
+    
+    Raises:
+        FileNotFoundError: Se o arquivo BRASIL.csv não for encontrado no ZIP
+        zipfile.BadZipFile: Se o ZIP estiver corrompido
+        IOError: Se houver erro ao gravar o arquivo final
+    """
+    try:
+        with zipfile.ZipFile(arquivo_zip, 'r') as zip_ref:
+            # Indexar entradas do ZIP por nome (diretório central)
+            infos = {info.filename: info for info in zip_ref.infolist()}
+            
+            # Procurar pelo arquivo BRASIL.csv: nome esperado ou qualquer '*_BRASIL.csv'
+            info_brasil = infos.get(arquivo_brasil) or next(
+                (info for nome, info in infos.items() if nome.endswith('_BRASIL.csv')),
+                None
+            )
+            
+            if info_brasil is None:
+                arquivos_no_zip = list(infos)
+                logger.error(f"Arquivos encontrados no ZIP: {arquivos_no_zip}")
+                raise FileNotFoundError(
+                    f"Arquivo BRASIL.csv não encontrado no ZIP. "
+                    f"Arquivos disponíveis: {arquivos_no_zip}"
+                )
+            
+            # Arquivo temporário no mesmo diretório do destino: a renomeação final é só metadado
+            caminho_temp = caminho_final.with_name(caminho_final.name + '.part')
+            
+            try:
+                # Descompactar direto para o destino (sem carregar o CSV inteiro em memória)
+                _descompactar_entrada(zip_ref, info_brasil, caminho_temp)
+                
+                # Substituição atômica: o CSV final nunca fica truncado após uma falha
+                os.replace(caminho_temp, caminho_final)
+            except (zipfile.BadZipFile, _RangeNaoSuportado, requests.RequestException):
+                # ZIP corrompido ou falha na leitura remota (_RangeHTTPFile): não é erro de gravação
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao salvar arquivo final: {e}")
+                raise IOError(f"Não foi possível salvar o arquivo em {caminho_final}: {e}")
+            finally:
+                # Em caso de falha, descartar o arquivo incompleto
+                if caminho_temp.exists():
+                    caminho_temp.unlink()
+            
+            logger.info(f"Arquivo extraído: {info_brasil.filename}")
+            return info_brasil.filename
+    
+    except zipfile.BadZipFile as e:
+        logger.error(f"Erro ao extrair ZIP: arquivo corrompido")
+        raise zipfile.BadZipFile(f"Arquivo ZIP corrompido: {e}")
+
+
+def download_tse_data(
+    tipo_consulta: str,
+    ano: int,
+    base_path: str = None,
+    extracao_remota: bool = False
+) -> str:
     """
     Baixa dados do portal TSE, extrai o arquivo BRASIL.csv e armazena localmente.
     
@@ -26,9 +878,12 @@ def download_tse_data(tipo_consulta: str, ano: int, base_path: str = None) -> st
         tipo_consulta (str): Tipo de consulta ('cand', 'cassacao', 'bens', 'vot_partido', 'vot_cand')
         ano (int): Ano dos dados desejados
         base_path (str, optional): Caminho base para armazenamento. Default: ../../data/raw
+        extracao_remota (bool, optional): Se True e o servidor aceitar Range, lê do ZIP remoto
+            apenas o diretório central e o BRASIL.csv, sem baixar os CSVs das UFs. Default: False
     
     Returns:
-        str: Caminho completo do arquivo salvo
+        str: Caminho completo do arquivo salvo, ou None se o cache local continuar
+             válido (304, ou conteúdo idêntico ao do CSV já salvo)
     
     Raises:
         ValueError: Se o tipo de consulta for inválido
@@ -45,166 +900,197 @@ def download_tse_data(tipo_consulta: str, ano: int, base_path: str = None) -> st
     
     # Obter configurações da consulta (Qual base de dados será baixada e qual o caminho padrão do armazenamento)
     config = CONSULTAS_CONFIG[tipo_consulta]
-    consulta_nome = config['consulta'] # Nome da consulta
-    pasta_destino = config['pasta_destino'] # Caminho padrão do armazenamento
+    consulta_nome = config.consulta # Nome da consulta
+    pasta_destino = config.pasta_destino # Caminho padrão do armazenamento
     
     # Definir caminho base de armazenamento do arquivo
     if base_path is None:
         # Caso não tenha um caminho personalizado informado - usa o caminho padrão de armazenamento portal-tse/data/raw/
         script_dir = Path(__file__).parent
-        base_path = script_dir / '../../data/raw'
+        base_path = (script_dir / '../../data/raw').resolve()
     else:
         # Caso tenha um caminho personalizado informado - usa o caminho informado
-        base_path = Path(base_path)
+        base_path = Path(base_path).resolve()
         
-        # Verificar se o diretório base existe
-        if not base_path.exists():
+        # Verificar se o diretório base existe (apenas no primeiro uso neste processo)
+        if base_path not in _MKDIR_CACHE and not base_path.exists():
             logger.info(f"Diretório base '{base_path}' não encontrado. Será criado automaticamente.")
     
+    # Caminho base normalizado uma única vez (resolve acima); os demais são derivados por junção simples
+    _ensure_dir(base_path)
+    
     # Construir URL de download
-    arquivo_zip = f"{consulta_nome}_{ano}.zip" # Cria o nome do arquivo zip, por exemplo: consulta_cand_2022.zip
-    url = f"{TSE_BASE_URL}/{consulta_nome}/{arquivo_zip}" # Cria a URL de download
+    arquivo_zip = config.zip_fmt.format(ano=ano) # Nome do arquivo zip, por exemplo: consulta_cand_2022.zip
+    url = config.url_fmt.format(ano=ano) # URL de download (modelo pré-calculado em config_ingest)
     
     # Definir caminho do arquivo de metadados de cache
         # IMPORTANTE - O arquivo metadata é essencial para verificação de necessidade do download. 
         # Caso o caminho informado não contenha o arquivo metadata, permitindo todos os primeiros downloads.
     metadata_file_path = base_path / 'tse_cache_metadata.json'
     
-    # Constante de configuração para retry
-    MAX_RETRIES = 3
+    # Validação de cache em uma única requisição: GET condicional com ETag/Last-Modified salvos
+    # O servidor responde 304 (sem corpo) se o arquivo não mudou, ou já envia o arquivo novo
+    headers_condicionais = get_conditional_headers(metadata_file_path, tipo_consulta, ano)
+    if headers_condicionais:
+        logger.info(f"Verificando cache para: {url}")
+    else:
+        logger.info(f"Iniciando download de: {url}")
     
-    # Executar requisição HEAD com retry para verificar se download é necessário
-    logger.info(f"Verificando cache para: {url}")
-    head_success = False
-    last_head_error = None
+    # Preparar caminho de destino com data de ingestão
+    data_ingestao = datetime.now().strftime('%Y%m%d')
+    nome_arquivo_final = f"{consulta_nome}_{ano}_BRASIL_{data_ingestao}.csv"
     
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            logger.debug(f"Tentativa {attempt}/{MAX_RETRIES} de requisição HEAD")
-            head_response = requests.head(url, timeout=30)
-            head_response.raise_for_status()
-            head_success = True
-            logger.debug(f"Requisição HEAD bem-sucedida na tentativa {attempt}")
-            break
-            
-        except requests.RequestException as e:
-            last_head_error = e
-            if attempt < MAX_RETRIES:
-                logger.warning(f"Tentativa {attempt}/{MAX_RETRIES} falhou: {e}. Tentando novamente...")
-            else:
-                logger.error(f"Todas as {MAX_RETRIES} tentativas de HEAD request falharam.")
-    
-    # Se HEAD falhou após todas as tentativas, abortar
-    if not head_success:
-        logger.error(f"Não foi possível verificar cache. Última tentativa falhou com: {last_head_error}")
-        raise requests.RequestException(
-            f"Falha ao verificar cache após {MAX_RETRIES} tentativas. "
-            f"Não é seguro prosseguir sem verificação de cache. Erro: {last_head_error}"
-        )
+    # Diretório de destino só é criado após o download e removido se a extração falhar (sem pastas vazias)
+    destino_dir = base_path / pasta_destino / str(ano)
     
-    # Verificar se download é necessário (HEAD foi bem-sucedido)
-    if not check_if_download_needed(
-        metadata_file_path,
-        tipo_consulta,
-        ano,
-        head_response.headers
-    ):
-        logger.info(f"Cache válido. Download pulado para {tipo_consulta}_{ano}")
-        return None
+    caminho_final = destino_dir / nome_arquivo_final
     
-    logger.info(f"Cache inválido ou inexistente. Prosseguindo com download.")
+    arquivo_brasil = f"{consulta_nome}_{ano}_BRASIL.csv"
+    download_headers = None
     
-    logger.info(f"Iniciando download de: {url}")
+    if extracao_remota:
+        # Extração remota: ZipFile lê diretório central e o BRASIL.csv via Range, sem baixar o ZIP completo
+        try:
+            with _DOWNLOAD_SEM:
+                with _RangeHTTPFile(url, headers_condicionais) as arquivo_remoto:
+                    logger.info(f"Extração remota de {arquivo_brasil} via requisições Range")
+                    criados = _criar_diretorio_destino(destino_dir)
+                    try:
+                        _extrair_brasil_csv(arquivo_remoto, arquivo_brasil, caminho_final)
+                    except BaseException:
+                        _remover_diretorios_criados(criados)
+                        raise
+                    download_headers = arquivo_remoto.headers
+        except _NaoModificado:
+            logger.info(f"Cache válido para {tipo_consulta}_{ano} (304 Not Modified). Download pulado.")
+            return None
+        except _RangeNaoSuportado as e:
+            logger.warning(f"Servidor não suporta extração remota ({e}). Baixando o ZIP completo.")
     
-    # Criar diretório temporário para download
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_zip_path = Path(temp_dir) / arquivo_zip
+    if download_headers is None:
+        # ZIP é baixado em caminho estável para permitir retomar downloads interrompidos
+        cache_dir = base_path / '.cache'
+        _ensure_dir(cache_dir)
+        caminho_parcial = cache_dir / f"{arquivo_zip}.partial"
         
-        # Download do arquivo ZIP
+        # Download do arquivo ZIP (limitado pelo semáforo global de downloads simultâneos)
         try:
-            response = requests.get(url, timeout=300, stream=True)
-            response.raise_for_status()
-            
-            # Salvar arquivo ZIP temporariamente
-            with open(temp_zip_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            with _DOWNLOAD_SEM:
+                download_headers, zip_baixado = _baixar_zip(url, caminho_parcial, headers_condicionais)
             
-            logger.info(f"Download concluído: {temp_zip_path}")
+            if isinstance(zip_baixado, io.BytesIO):
+                logger.info(f"Download concluído em memória: {arquivo_zip}")
+            else:
+                logger.info(f"Download concluído: {caminho_parcial}")
             
+        except _NaoModificado:
+            logger.info(f"Cache válido para {tipo_consulta}_{ano} (304 Not Modified). Download pulado.")
+            return None
         except requests.RequestException as e:
             logger.error(f"Erro ao baixar arquivo ZIP: {e}")
             raise requests.RequestException(
                 f"Não foi possível baixar o arquivo de {url}. Erro: {e}"
             )
         
-        # Extrair arquivo BRASIL.csv do ZIP
-        arquivo_brasil = f"{consulta_nome}_{ano}_BRASIL.csv"
-        arquivo_encontrado = False
-        
+        criados = _criar_diretorio_destino(destino_dir)
         try:
-            with zipfile.ZipFile(temp_zip_path, 'r') as zip_ref:
-                # Listar arquivos no ZIP
-                arquivos_no_zip = zip_ref.namelist()
-                
-                # Procurar pelo arquivo BRASIL.csv
-                for arquivo in arquivos_no_zip:
-                    if arquivo.endswith('_BRASIL.csv') or arquivo == arquivo_brasil:
-                        arquivo_encontrado = True
-                        arquivo_brasil = arquivo
-                        
-                        # Extrair arquivo
-                        zip_ref.extract(arquivo, temp_dir)
-                        logger.info(f"Arquivo extraído: {arquivo}")
-                        break
-                
-                if not arquivo_encontrado:
-                    logger.error(f"Arquivos encontrados no ZIP: {arquivos_no_zip}")
-                    raise FileNotFoundError(
-                        f"Arquivo BRASIL.csv não encontrado no ZIP. "
-                        f"Arquivos disponíveis: {arquivos_no_zip}"
-                    )
-        
-        except zipfile.BadZipFile as e:
-            logger.error(f"Erro ao extrair ZIP: arquivo corrompido")
-            raise zipfile.BadZipFile(f"Arquivo ZIP corrompido: {e}")
-        
-        # Preparar caminho de destino com data de ingestão
-        data_ingestao = datetime.now().strftime('%Y%m%d')
-        nome_arquivo_final = f"{consulta_nome}_{ano}_BRASIL_{data_ingestao}.csv"
-        
-        destino_dir = base_path / pasta_destino / str(ano)
-        destino_dir.mkdir(parents=True, exist_ok=True)
-        
-        caminho_final = (destino_dir / nome_arquivo_final).resolve()
-        
-        # Mover arquivo extraído para destino final
-        arquivo_extraido = Path(temp_dir) / arquivo_brasil
-        
+            _extrair_brasil_csv(zip_baixado, arquivo_brasil, caminho_final)
+        except BaseException:
+            # ZIP corrompido ou sem BRASIL.csv: não deixar <pasta>/<ano> vazio para trás
+            _remover_diretorios_criados(criados)
+            raise
+        finally:
+            # ZIP já foi processado (ou está corrompido): não há o que retomar
+            _remover_parcial(caminho_parcial)
+    
+    # ETag novo com o mesmo conteúdo (ex: arquivo regenerado pelo CDN): manter o CSV já existente
+    conteudo_hash = compute_content_hash(caminho_final)
+    arquivo_existente = find_cached_file_with_hash(metadata_file_path, tipo_consulta, ano, conteudo_hash)
+    if arquivo_existente is not None and arquivo_existente != caminho_final:
+        caminho_final.unlink()
+        logger.info(
+            f"Conteúdo de {tipo_consulta}_{ano} inalterado (mesmo hash). "
+            f"Mantendo {arquivo_existente}."
+        )
         try:
-            # Copiar arquivo para destino
-            with open(arquivo_extraido, 'rb') as src, open(caminho_final, 'wb') as dst:
-                dst.write(src.read())
-            
-            logger.info(f"Arquivo armazenado com sucesso em: {caminho_final}")
-            
-            # Atualizar metadados de cache após download bem-sucedido
-            # IMPORTANTE: Usar headers da resposta GET (response.headers), não do HEAD
-            # Isso garante que os metadados reflitam o arquivo realmente baixado
-            try:
-                update_metadata_after_download(
-                    metadata_file_path,
-                    tipo_consulta,
-                    ano,
-                    response.headers,  # Headers do GET bem-sucedido, não do HEAD
-                    caminho_final,  # Caminho do arquivo salvo
-                    base_path  # Caminho base para cálculo relativo
-                )
-            except Exception as e:
-                logger.warning(f"Erro ao atualizar metadados de cache: {e}")
-            
+            update_metadata_after_download(
+                metadata_file_path,
+                tipo_consulta,
+                ano,
+                download_headers,  # Novos validadores HTTP, para receber 304 nas próximas execuções
+                arquivo_existente,
+                base_path,
+                conteudo_hash
+            )
         except Exception as e:
-            logger.error(f"Erro ao salvar arquivo final: {e}")
-            raise IOError(f"Não foi possível salvar o arquivo em {caminho_final}: {e}")
+            logger.warning(f"Erro ao atualizar metadados de cache: {e}")
+        return None
+    
+    logger.info(f"Arquivo armazenado com sucesso em: {caminho_final}")
+    
+    # Atualizar metadados de cache após download bem-sucedido
+    # IMPORTANTE: Usar headers da resposta GET (download_headers), não do HEAD
+    # Isso garante que os metadados reflitam o arquivo realmente baixado
+    try:
+        update_metadata_after_download(
+            metadata_file_path,
+            tipo_consulta,
+            ano,
+            download_headers,  # Headers do GET bem-sucedido, não do HEAD
+            caminho_final,  # Caminho do arquivo salvo
+            base_path,  # Caminho base para cálculo relativo
+            conteudo_hash  # Hash já calculado acima
+        )
+    except Exception as e:
+        logger.warning(f"Erro ao atualizar metadados de cache: {e}")
     
     return str(caminho_final)
+
+
+def download_many(
+    jobs: List[Tuple[str, int]],
+    max_concurrent: int = MAX_CONCURRENT_DOWNLOADS,
+    base_path: str = None,
+    extracao_remota: bool = False
+) -> Dict[Tuple[str, int], Union[str, None, Exception]]:
+    """
+    Baixa vários pares (tipo_consulta, ano) em paralelo.
+    
+    Cada job é executado por download_tse_data em um pool de threads. O número de
+    downloads simultâneos é limitado por max_concurrent e, globalmente, por
+    MAX_CONCURRENT_DOWNLOADS.
+    
+    Args:
+        jobs (List[Tuple[str, int]]): Lista de pares (tipo_consulta, ano). Pares repetidos são baixados uma vez
+        max_concurrent (int, optional): Número máximo de downloads simultâneos. Default: 4
+        base_path (str, optional): Caminho base para armazenamento. Default: ../../data/raw
+        extracao_remota (bool, optional): Repassado para download_tse_data. Default: False
+    
+    Returns:
+        Dict: Mapeia cada (tipo_consulta, ano) para o caminho do arquivo salvo (str),
+              None se o cache estava válido, ou a exceção levantada em caso de erro
+    """
+    resultados = {}
+    
+    # Jobs repetidos (ex: '2018,2018' no prompt) gravariam os mesmos arquivos em paralelo
+    jobs_unicos = list(dict.fromkeys(jobs))
+    
+    with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+        futures = {
+            job: executor.submit(download_tse_data, job[0], job[1], base_path, extracao_remota)
+            for job in jobs_unicos
+        }
+        
+        try:
+            for job, future in futures.items():
+                try:
+                    resultados[job] = future.result()
+                except Exception as e:
+                    logger.error(f"Erro ao baixar {job[0]}_{job[1]}: {e}")
+                    resultados[job] = e
+        except BaseException:
+            # Ctrl+C: cancelar os jobs ainda na fila em vez de esperar todos terminarem
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    
+    return resultados
@@ -9,39 +9,101 @@ Os metadados são armazenados em formato JSON com a seguinte estrutura:
     "cand_2022": {
         "ETag": "\"abc123\"",
         "Last-Modified": "Wed, 21 Oct 2020 07:28:00 GMT",
-        "file_path": "portal-tse/data/raw/candidatos/2022/consulta_cand_2022_BRASIL_20251123.csv"
+        "file_path": "candidatos/2022/consulta_cand_2022_BRASIL_20251123.csv",
+        "file_size": 123456789,
+        "content_hash": "xxh3_128:0123456789abcdef0123456789abcdef"
     }
 }
 """
 
+import hashlib
 import json
 import logging
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Opcional: sem orjson, usa o json da biblioteca padrão
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:  # Opcional: sem xxhash, usa BLAKE2b da biblioteca padrão
+    xxhash = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 logger = logging.getLogger(__name__)
 
+# Serializa leitura-modificação-escrita dos metadados entre threads do mesmo processo
+# (o lock de arquivo em _lock_metadata cobre processos diferentes)
+_THREAD_LOCK = threading.Lock()
+
+# Cache em memória dos metadados já lidos: caminho -> ((st_mtime_ns, st_size), dados)
+# Invalidado automaticamente quando o arquivo é modificado em disco
+_META_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict]] = {}
+
+# Tamanho do bloco lido ao calcular o hash de conteúdo dos arquivos
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _json_loads(conteudo: bytes) -> Dict:
+    """Decodifica o JSON de metadados (orjson se disponível, senão json)."""
+    if orjson is not None:
+        return orjson.loads(conteudo)
+    return json.loads(conteudo.decode('utf-8'))
 
-def load_metadata(metadata_path: Path) -> Dict:
+
+def _json_dumps(data: Dict) -> bytes:
+    """Codifica os metadados em JSON UTF-8 indentado (orjson se disponível, senão json)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def load_metadata(metadata_path: Path, use_cache: bool = True) -> Dict:
     """
     Carrega metadados de cache do arquivo JSON.
     
+    O conteúdo é mantido em memória e só é relido do disco quando o mtime ou o
+    tamanho do arquivo mudam.
+    
     Args:
         metadata_path (Path): Caminho para o arquivo JSON de metadados
+        use_cache (bool, optional): Se False, sempre lê do disco. Necessário sob
+            _lock_metadata: com mtime de baixa resolução, outro processo pode
+            regravar o arquivo com o mesmo tamanho sem mudar (mtime, tamanho). Default: True
     
     Returns:
         Dict: Dicionário com metadados de cache. Retorna dict vazio se arquivo não existir.
     """
-    if not metadata_path.exists():
+    try:
+        stat = metadata_path.stat()
+    except FileNotFoundError:
         logger.debug(f"Arquivo de metadados não encontrado: {metadata_path}")
+        _META_CACHE.pop(metadata_path, None)
         return {}
     
+    versao = (stat.st_mtime_ns, stat.st_size)
+    cached = _META_CACHE.get(metadata_path) if use_cache else None
+    if cached is not None and cached[0] == versao:
+        # Cópia rasa: quem chama pode alterar o dict sem afetar o cache
+        return dict(cached[1])
+    
     try:
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            logger.debug(f"Metadados carregados: {len(data)} entradas")
-            return data
-    except json.JSONDecodeError as e:
+        data = _json_loads(metadata_path.read_bytes())
+        logger.debug(f"Metadados carregados: {len(data)} entradas")
+        _META_CACHE[metadata_path] = (versao, dict(data))
+        return data
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError é subclasse
         logger.warning(f"Erro ao decodificar JSON de metadados: {e}. Retornando dict vazio.")
         return {}
     except Exception as e:
@@ -49,10 +111,44 @@ def load_metadata(metadata_path: Path) -> Dict:
         return {}
 
 
+@contextmanager
+def _lock_metadata(metadata_path: Path) -> Iterator[None]:
+    """
+    Mantém um lock exclusivo sobre o arquivo de metadados enquanto ativo.
+    
+    O lock é feito em um arquivo irmão '.lock' (o JSON é substituído a cada
+    gravação, então não pode ser ele mesmo o alvo do lock).
+    
+    Args:
+        metadata_path (Path): Caminho para o arquivo JSON de metadados
+    """
+    metadata_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = metadata_path.with_name(metadata_path.name + '.lock')
+    
+    with _THREAD_LOCK, open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
 def save_metadata(metadata_path: Path, data: Dict) -> None:
     """
     Salva metadados de cache no arquivo JSON de forma segura.
     
+    O conteúdo é gravado em um arquivo temporário e depois renomeado sobre o
+    original (os.replace é atômico), então uma interrupção no meio da gravação
+    nunca deixa o JSON truncado.
+    
     Args:
         metadata_path (Path): Caminho para o arquivo JSON de metadados
         data (Dict): Dicionário com metadados a serem salvos
@@ -61,9 +157,26 @@ def save_metadata(metadata_path: Path, data: Dict) -> None:
         # Criar diretório pai se não existir
         metadata_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Salvar com formatação legível
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Salvar com formatação legível em arquivo temporário
+        tmp_path = metadata_path.with_name(
+            f"{metadata_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_json_dumps(data))
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # Substituição atômica do arquivo de metadados
+            os.replace(tmp_path, metadata_path)
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+        
+        # Atualizar cache em memória com a versão recém-gravada
+        stat = metadata_path.stat()
+        _META_CACHE[metadata_path] = ((stat.st_mtime_ns, stat.st_size), dict(data))
         
         logger.debug(f"Metadados salvos com sucesso: {metadata_path}")
     except Exception as e:
@@ -71,6 +184,115 @@ def save_metadata(metadata_path: Path, data: Dict) -> None:
         raise
 
 
+def is_local_file_valid(metadata_path: Path, saved_meta: Dict) -> bool:
+    """
+    Verifica se o CSV registrado nos metadados ainda existe em disco com o tamanho esperado.
+    
+    Apenas um stat(), sem acesso à rede. Se o arquivo local foi apagado ou
+    alterado, o cache HTTP não serve: o download é necessário mesmo que o
+    arquivo no servidor não tenha mudado.
+    
+    Args:
+        metadata_path (Path): Caminho para o arquivo JSON de metadados (fica no base_path)
+        saved_meta (Dict): Entrada de metadados da consulta
+    
+    Returns:
+        bool: True se o arquivo existe e o tamanho confere (quando registrado)
+    """
+    file_path = saved_meta.get('file_path')
+    if not file_path:
+        # Entradas sem caminho registrado: não há como verificar
+        return True
+    
+    # file_path é relativo ao base_path, que é o diretório do arquivo de metadados
+    local_path = Path(file_path)
+    if not local_path.is_absolute():
+        local_path = metadata_path.parent / local_path
+    
+    try:
+        stat = local_path.stat()
+    except OSError:
+        logger.info(f"Arquivo local não encontrado: {local_path}")
+        return False
+    
+    expected_size = saved_meta.get('file_size')
+    if expected_size is not None and stat.st_size != expected_size:
+        logger.info(f"Tamanho do arquivo local difere do registrado: {local_path}")
+        return False
+    
+    return True
+
+
+def compute_content_hash(file_path: Path) -> str:
+    """
+    Calcula o hash de conteúdo de um arquivo, lido em blocos de HASH_BLOCK_SIZE.
+    
+    Usa xxh3-128 (xxhash) se disponível, senão BLAKE2b de 128 bits. O algoritmo
+    vai como prefixo do resultado, para que hashes de algoritmos diferentes
+    nunca sejam considerados iguais.
+    
+    Args:
+        file_path (Path): Caminho do arquivo
+    
+    Returns:
+        str: Hash no formato '<algoritmo>:<hex>'
+    
+    Raises:
+        OSError: Se o arquivo não puder ser lido
+    """
+    if xxhash is not None:
+        algoritmo, h = 'xxh3_128', xxhash.xxh3_128()
+    else:
+        algoritmo, h = 'blake2b', hashlib.blake2b(digest_size=16)
+    
+    with open(file_path, 'rb') as f:
+        while True:
+            bloco = f.read(HASH_BLOCK_SIZE)
+            if not bloco:
+                break
+            h.update(bloco)
+    
+    return f"{algoritmo}:{h.hexdigest()}"
+
+
+def find_cached_file_with_hash(
+    metadata_path: Path,
+    tipo_consulta: str,
+    ano: int,
+    content_hash: str
+) -> Optional[Path]:
+    """
+    Procura o arquivo local já registrado para a consulta com o mesmo conteúdo.
+    
+    Útil quando o servidor muda o ETag sem mudar o conteúdo (ex: arquivo
+    regenerado pelo CDN): o arquivo antigo continua válido.
+    
+    Args:
+        metadata_path (Path): Caminho para o arquivo JSON de metadados
+        tipo_consulta (str): Tipo de consulta ('cand', 'bens', etc.)
+        ano (int): Ano dos dados
+        content_hash (str): Hash de conteúdo do arquivo recém-baixado (compute_content_hash)
+    
+    Returns:
+        Optional[Path]: Caminho do arquivo registrado, se o hash salvo coincidir e o
+                        arquivo ainda existir com o tamanho registrado. None caso contrário.
+    """
+    cache_key = f"{tipo_consulta}_{ano}"
+    saved_meta = load_metadata(metadata_path).get(cache_key)
+    
+    if not saved_meta or not saved_meta.get('file_path'):
+        return None
+    if saved_meta.get('content_hash') != content_hash:
+        return None
+    if not is_local_file_valid(metadata_path, saved_meta):
+        return None
+    
+    local_path = Path(saved_meta['file_path'])
+    if not local_path.is_absolute():
+        local_path = metadata_path.parent / local_path
+    return local_path
+
+
 def check_if_download_needed(
     metadata_path: Path,
     tipo_consulta: str,
@@ -107,9 +329,15 @@ def check_if_download_needed(
     
     saved_meta = metadata[cache_key]
     
-    # Extrair headers atuais (case-insensitive)
-    current_etag = current_headers.get('ETag') or current_headers.get('etag')
-    current_last_modified = current_headers.get('Last-Modified') or current_headers.get('last-modified')
+    # Arquivo local ausente ou alterado: download necessário independentemente dos headers
+    if not is_local_file_valid(metadata_path, saved_meta):
+        logger.info(f"Arquivo local de {cache_key} ausente ou alterado. Download necessário.")
+        return True
+    
+    # Extrair headers atuais (normalizados para minúsculas: aceita dict comum ou CaseInsensitiveDict)
+    headers = {k.lower(): v for k, v in current_headers.items()}
+    current_etag = headers.get('etag')
+    current_last_modified = headers.get('last-modified')
     
     # Verificação primária: ETag
     if current_etag and saved_meta.get('ETag'):
@@ -134,13 +362,55 @@ def check_if_download_needed(
     return True
 
 
+def get_conditional_headers(
+    metadata_path: Path,
+    tipo_consulta: str,
+    ano: int
+) -> Dict:
+    """
+    Monta os headers de uma requisição GET condicional a partir dos metadados salvos.
+    
+    Com If-None-Match (ETag) e If-Modified-Since (Last-Modified), o servidor
+    responde 304 Not Modified, sem corpo, quando o arquivo não mudou.
+    
+    Args:
+        metadata_path (Path): Caminho para o arquivo JSON de metadados
+        tipo_consulta (str): Tipo de consulta ('cand', 'bens', etc.)
+        ano (int): Ano dos dados
+    
+    Returns:
+        Dict: Headers condicionais. Dict vazio se não houver cache salvo para a consulta
+              ou se o arquivo local registrado não existir mais.
+    """
+    cache_key = f"{tipo_consulta}_{ano}"
+    saved_meta = load_metadata(metadata_path).get(cache_key)
+    
+    if not saved_meta:
+        logger.info(f"Nenhum cache encontrado para {cache_key}. Download necessário.")
+        return {}
+    
+    # Sem o arquivo local, um 304 do servidor não adiantaria: pedir o arquivo completo
+    if not is_local_file_valid(metadata_path, saved_meta):
+        logger.info(f"Arquivo local de {cache_key} ausente ou alterado. Download necessário.")
+        return {}
+    
+    headers = {}
+    if saved_meta.get('ETag'):
+        headers['If-None-Match'] = saved_meta['ETag']
+    if saved_meta.get('Last-Modified'):
+        headers['If-Modified-Since'] = saved_meta['Last-Modified']
+    
+    return headers
+
+
 def update_metadata_after_download(
     metadata_path: Path,
     tipo_consulta: str,
     ano: int,
     new_headers: Dict,
     file_path: Path = None,
-    base_path: Path = None
+    base_path: Path = None,
+    content_hash: str = None
 ) -> None:
     """
     Atualiza metadados de cache após download bem-sucedido.
@@ -152,26 +422,26 @@ def update_metadata_after_download(
         new_headers (Dict): Headers HTTP da requisição que levou ao download
         file_path (Path, optional): Caminho completo do arquivo baixado
         base_path (Path, optional): Caminho base usado no download
+        content_hash (str, optional): Hash de conteúdo já calculado. Se omitido, é
+                                      calculado a partir de file_path
     """
     # Gerar chave de cache
     cache_key = f"{tipo_consulta}_{ano}"
     
-    # Carregar metadados existentes
-    metadata = load_metadata(metadata_path)
-    
-    # Extrair headers relevantes (case-insensitive)
-    etag = new_headers.get('ETag') or new_headers.get('etag')
-    last_modified = new_headers.get('Last-Modified') or new_headers.get('last-modified')
+    # Extrair headers relevantes (normalizados para minúsculas: aceita dict comum ou CaseInsensitiveDict)
+    headers = {k.lower(): v for k, v in new_headers.items()}
+    etag = headers.get('etag')
+    last_modified = headers.get('last-modified')
     
     # Calcular caminho relativo ao base_path
     relative_path = None
     if file_path and base_path:
         try:
-            file_path_obj = Path(file_path).resolve()
-            base_path_obj = Path(base_path).resolve()
-            
-            # Calcular caminho relativo ao base_path
-            relative_path_obj = file_path_obj.relative_to(base_path_obj)
+            # Caminhos derivados do mesmo base_path dispensam resolve() (um lstat por componente)
+            try:
+                relative_path_obj = Path(file_path).relative_to(base_path)
+            except ValueError:
+                relative_path_obj = Path(file_path).resolve().relative_to(Path(base_path).resolve())
             
             # Converter para string com barras Unix (/) para portabilidade
             relative_path = str(relative_path_obj).replace('\\', '/')
@@ -189,14 +459,34 @@ def update_metadata_after_download(
         # Se não tiver base_path, usar apenas o nome do arquivo
         relative_path = Path(file_path).name
     
-    # Atualizar entrada
-    metadata[cache_key] = {
-        'ETag': etag,
-        'Last-Modified': last_modified,
-        'file_path': relative_path
-    }
+    # Tamanho do arquivo salvo, usado para validar o cache local sem acesso à rede
+    file_size = None
+    if file_path:
+        try:
+            file_size = Path(file_path).stat().st_size
+        except OSError as e:
+            logger.warning(f"Não foi possível obter o tamanho de {file_path}: {e}")
+    
+    # Hash de conteúdo, para reconhecer o mesmo arquivo servido com outro ETag
+    if content_hash is None and file_path:
+        try:
+            content_hash = compute_content_hash(file_path)
+        except OSError as e:
+            logger.warning(f"Não foi possível calcular o hash de {file_path}: {e}")
     
-    # Salvar metadados atualizados
-    save_metadata(metadata_path, metadata)
+    # Ler, atualizar e salvar sob lock para não perder entradas gravadas por downloads paralelos
+    with _lock_metadata(metadata_path):
+        # Leitura direto do disco: o cache em memória pode não ver a gravação de outro processo
+        metadata = load_metadata(metadata_path, use_cache=False)
+        
+        metadata[cache_key] = {
+            'ETag': etag,
+            'Last-Modified': last_modified,
+            'file_path': relative_path,
+            'file_size': file_size,
+            'content_hash': content_hash
+        }
+        
+        save_metadata(metadata_path, metadata)
     
     logger.info(f"Metadados atualizados para {cache_key}")
@@ -38,7 +38,7 @@ e ano deseja baixar do portal de dados abertos do TSE.
         Armazenamento: ../../data/raw/comparecimento_abstencao/{ano}/perfil_comparecimento_abstencao_{ano}_BRASIL_{data_ingestao}.csv
 """
 
-from download_data import download_tse_data
+from download_data import download_tse_data, download_many
 from config_ingest import CONSULTAS_CONFIG
 import logging
 
@@ -54,7 +54,7 @@ def exibir_opcoes():
     print("\nTipos de consulta disponíveis:\n")
     
     for idx, (chave, config) in enumerate(CONSULTAS_CONFIG.items(), 1):
-        descricao = config.get('descricao', 'Sem descrição')
+        descricao = config.descricao or 'Sem descrição'
         print(f"  {idx}. [{chave}] - {descricao}")
     
     print("\n" + "="*60)
@@ -71,19 +71,19 @@ def obter_tipo_consulta():
             print(f"❌ Tipo inválido! Opções válidas: {list(CONSULTAS_CONFIG.keys())}")
 
 
-def obter_ano():
-    """Solicita ao usuário o ano desejado"""
+def obter_anos():
+    """Solicita ao usuário um ou mais anos desejados (separados por vírgula)"""
     while True:
         try:
-            ano_input = input("\nDigite o ano eleitoral desejado (ex: 2022): ").strip()
-            ano = int(ano_input)
+            anos_input = input("\nDigite o(s) ano(s) eleitoral(is) desejado(s) (ex: 2022 ou 2018,2022): ").strip()
+            anos = [int(ano) for ano in anos_input.split(',') if ano.strip()]
 
-            if 2010 <= ano <= 2024:  # Validação básica de ano
-                return ano
+            if anos and all(2010 <= ano <= 2024 for ano in anos):  # Validação básica de ano
+                return anos
             else:
-                print("❌ Ano inválido! Digite um ano entre 2010 e 2024.")
+                print("❌ Ano inválido! Digite anos entre 2010 e 2024.")
         except ValueError:
-            print("❌ Por favor, digite um número válido para o ano.")
+            print("❌ Por favor, digite números válidos para o(s) ano(s).")
 
 
 def main():
@@ -96,12 +96,30 @@ def main():
         # Obter tipo de consulta
         tipo_consulta = obter_tipo_consulta()
         
-        # Obter ano
-        ano = obter_ano()
+        # Obter ano(s)
+        anos = obter_anos()
+        
+        # Vários anos: downloads em paralelo
+        if len(anos) > 1:
+            print("\n🚀 Iniciando downloads em paralelo...\n")
+            resultados = download_many([(tipo_consulta, ano) for ano in anos])
+            
+            print("\n" + "="*60)
+            print("RESUMO DOS DOWNLOADS")
+            print("="*60)
+            for (tipo, ano), resultado in resultados.items():
+                if isinstance(resultado, Exception):
+                    print(f"❌ {tipo}_{ano}: {resultado}")
+                elif resultado is None:
+                    print(f"✅ {tipo}_{ano}: cache válido, download não necessário")
+                else:
+                    print(f"✅ {tipo}_{ano}: {resultado}")
+            print("="*60 + "\n")
+            return
         
         # Executar download
         print("\n🚀 Iniciando download...\n")
-        caminho_salvo = download_tse_data(tipo_consulta, ano)
+        caminho_salvo = download_tse_data(tipo_consulta, anos[0])
         
         # Sucesso
         print("\n" + "="*60)